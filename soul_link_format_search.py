@@ -1,7 +1,7 @@
 """Finds teams with Pokemon that each player want via regex search."""
 
 import re
-from typing import List
+from typing import Dict, Iterable, List, Tuple
 import argparse
 
 
@@ -11,6 +11,12 @@ END_TEAM_PATTERN = r"[a-z|A-Z|:|\||\n|\s|-|']*"
 TEAM_END = r"\n\n"
 EOP = "EOP---EOP"
 EOM = "EOM--------------------------------EOM"
+EOQ = "EOQ================================EOQ"
+TEAM_SEPARATOR = "--------------------------------\n"
+QUERY_SEPARATOR = ";"
+REGEX_SYNTAX = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+PlayerPicks = Tuple[str, List[str]]
 
 
 # pylint: disable=unused-argument
@@ -54,6 +60,23 @@ def get_regex(player: str, pokes: List[str]) -> str:
         poke_regex for _ in pokes) + END_TEAM_PATTERN + TEAM_END + r")"
 
 
+def get_query_regex(query: List[PlayerPicks]) -> str:
+    """The regex for getting the teams where every player has their pokemon.
+
+    Args:
+        query (List[PlayerPicks]): The name of each player and the pokemon they want.
+
+    Returns:
+        str: Regex pattern for searching for viable teams.
+    """
+    regex = r""
+    for i, (player, pokes) in enumerate(query):
+        regex += get_regex(player, pokes)
+        if i < len(query) - 1:
+            regex += SIZE_COUNT_REGEX_PATTERN
+    return regex
+
+
 def script_prompt():
     """Prompt for getting information on players and their pokemon picks.
     """
@@ -111,6 +134,184 @@ def get_output(regex: str, multi_players: bool, filename: str = "test.txt",
     vprint(regex)
 
 
+def parse_query(line: str) -> List[PlayerPicks]:
+    """Parses a query of players and the pokemon they want in their team.
+    Each player is separated by a semicolon and followed by their pokemon,
+    e.g. "Ray Muk Vigoroth; Shen Diglett". A query without any players is empty.
+
+    Args:
+        line (str): The query.
+
+    Returns:
+        List[PlayerPicks]: The name of each player and the pokemon they want.
+    """
+    query = []
+    for player_args in line.split(QUERY_SEPARATOR):
+        player_args = player_args.split()
+        if player_args:
+            query.append((player_args[0], player_args[1:]))
+    return query
+
+
+def search_team_records(records: List[str],
+                        queries: List[List[PlayerPicks]]) -> List[List[re.Match]]:
+    """Finds the matches of every query within the team records.
+
+    A regex match never crosses a team separator, so each record is searched on its own.
+    A player's pokemon are matched once each from any of the names they want, so a record
+    can only match if it contains the player's name and, counted together, at least as many
+    occurrences of those names as the player wants. Bitsets of the records containing each
+    name at least k times are built once and used to skip records before running the regex.
+
+    Args:
+        records (List[str]): The formatted team pairs split by TEAM_SEPARATOR.
+        queries (List[List[PlayerPicks]]): The queries parsed by parse_query.
+
+    Returns:
+        List[List[re.Match]]: The regex matches of each query, in file order.
+    """
+    max_count = max((len(pokes) for query in queries for _, pokes in query), default=0)
+    max_count = max(max_count, 1)
+    bitsets: Dict[str, List[int]] = {}
+
+    results = []
+    for query in queries:
+        if not query:
+            results.append([])
+            continue
+
+        candidates = _get_query_candidates(records, query, max_count, bitsets)
+        regex = re.compile(get_query_regex(query))
+        matches = []
+        while candidates:
+            low = candidates & -candidates
+            matches.extend(regex.finditer(records[low.bit_length() - 1]))
+            candidates ^= low
+        results.append(matches)
+    return results
+
+
+def _get_query_candidates(records: List[str], query: List[PlayerPicks], max_count: int,
+                          bitsets: Dict[str, List[int]]) -> int:
+    """Gets the bitset of the records that can match a query.
+
+    Args:
+        records (List[str]): The formatted team pairs split by TEAM_SEPARATOR.
+        query (List[PlayerPicks]): The name of each player and the pokemon they want.
+        max_count (int): The most pokemon any player wants.
+        bitsets (Dict[str, List[int]]): The bitsets built so far, by name.
+
+    Returns:
+        int: The bitset of the candidate records.
+    """
+    candidates = (1 << len(records)) - 1
+    for player, pokes in query:
+        candidates &= _get_count_bitsets(records, player + "\n", max_count, bitsets)[1]
+
+        # reach[j] holds the records with at least j occurrences of the names seen so far.
+        reach = [(1 << len(records)) - 1] + [0] * len(pokes)
+        for poke in dict.fromkeys(pokes):
+            counts = _get_count_bitsets(records, poke, max_count, bitsets)
+            reach = [_or_all(reach[j - k] & counts[k] for k in range(j + 1))
+                     for j in range(len(pokes) + 1)]
+        candidates &= reach[-1]
+    return candidates
+
+
+def _get_count_bitsets(records: List[str], text: str, max_count: int,
+                       bitsets: Dict[str, List[int]]) -> List[int]:
+    """Gets the bitsets of the records containing text, where index k holds the records
+    containing it at least k times. Names with regex syntax may match text that does not
+    contain them, so they match every record.
+
+    Args:
+        records (List[str]): The formatted team pairs split by TEAM_SEPARATOR.
+        text (str): The name to count.
+        max_count (int): The largest count to build a bitset for.
+        bitsets (Dict[str, List[int]]): The bitsets built so far, updated with text's bitsets.
+
+    Returns:
+        List[int]: The bitsets for counts 0 to max_count.
+    """
+    everything = (1 << len(records)) - 1
+    if REGEX_SYNTAX.search(text):
+        return [everything] * (max_count + 1)
+    if text not in bitsets:
+        counts = [everything] + [0] * max_count
+        for r, record in enumerate(records):
+            for k in range(1, min(record.count(text), max_count) + 1):
+                counts[k] |= 1 << r
+        bitsets[text] = counts
+    return bitsets[text]
+
+
+def _or_all(bitsets: Iterable[int]) -> int:
+    """Combines bitsets into the bitset of every member.
+
+    Args:
+        bitsets (Iterable[int]): The bitsets.
+
+    Returns:
+        int: The union of the bitsets.
+    """
+    output = 0
+    for bits in bitsets:
+        output |= bits
+    return output
+
+
+def get_batch_output(query_name: str, filename: str = "test.txt",
+                     output_name: str = "search.txt", verbose: bool = True):
+    """Outputs search results of every query in query_name from filename to output_name.
+    Prints results if verbose is true.
+
+    Each query is written on its own line, followed by its matches in the same layout
+    as get_output, and ends with EOQ. Queries without any players are skipped.
+
+    Args:
+        query_name (str): The name of the file of queries, one per line.
+        filename (str, optional): The name of the input file. Defaults to "test.txt".
+        output_name (str, optional): The name of the output file. Defaults to "search.txt".
+        verbose (bool, optional): If true, we print the results. Defaults to True.
+    """
+    vprint = print
+    if not verbose:
+        vprint = blank_fn
+
+    with open(query_name, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+
+    # Skip blank lines and queries without any players.
+    queries = [parse_query(line) for line in lines]
+    lines = [line for line, query in zip(lines, queries) if query]
+    queries = [query for query in queries if query]
+
+    with open(filename, "r", encoding="utf-8") as f:
+        records = f.read().split(TEAM_SEPARATOR)
+
+    results = search_team_records(records, queries)
+    with open(output_name, "w+", encoding="utf-8") as f:
+        for line, query, matches in zip(lines, queries, results):
+            vprint(line)
+            f.write(line + "\n")
+            for match in matches:
+                vprint(match.group(1), end="")
+                f.write(match.group(1))
+                if len(query) > 1:
+                    vprint(EOP)
+                    f.write(EOP)
+                    f.write("\n")
+
+                    vprint(match.group(2), end="")
+                    f.write(match.group(2))
+                vprint(EOM)
+                f.write(EOM)
+                f.write("\n")
+            vprint(EOQ)
+            f.write(EOQ)
+            f.write("\n")
+
+
 def parse_args() -> argparse.ArgumentParser:
     """Creates the default parser for arguments.
 
@@ -120,6 +321,9 @@ def parse_args() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser("")
     parser.add_argument("-p", "--playerpoke", nargs='+', action='append',
                         help="The name of the player and the pokemon they want in their team.")
+    parser.add_argument("-q", "--queries", default=None,
+                        help="A file of queries, one per line, to search in a single pass. "
+                        "Players are separated by semicolons, e.g. \"Ray Muk; Shen Diglett\".")
     parser.add_argument("-f", "--filename", nargs=1, default="test.txt",
                         help="The input file for searching for viable teams.")
     parser.add_argument("-o", "--output", nargs=1, default="search.txt",
@@ -127,21 +331,36 @@ def parse_args() -> argparse.ArgumentParser:
     return parser.parse_args()
 
 
+def _get_arg(value: str | List[str]) -> str:
+    """Gets the value of a single-valued argument, which is a list when given by the user.
+
+    Args:
+        value (str | List[str]): The argument's value.
+
+    Returns:
+        str: The single value.
+    """
+    if isinstance(value, list):
+        return value[0]
+    return value
+
+
 def main():
     """The main function
     """
     args = parse_args()
+    if args.queries:
+        get_batch_output(args.queries, _get_arg(args.filename), _get_arg(args.output))
+        return
+
     print("Args")
     print(args.playerpoke)
     if not args.playerpoke:
         script_prompt()
         return
 
-    regex = r""
-    for i, player_args in enumerate(args.playerpoke):
-        regex += get_regex(player_args[0], player_args[1:])
-        if i < len(args.playerpoke) - 1:
-            regex += SIZE_COUNT_REGEX_PATTERN
+    regex = get_query_regex(
+        [(player_args[0], player_args[1:]) for player_args in args.playerpoke])
 
     get_output(regex, len(args.playerpoke) > 1)
 
@@ -1,6 +1,8 @@
 """Matcher for Pokemon Soul Link Nuzlocke Challenge."""
 
-from typing import Annotated, List, Set, Tuple
+from typing import Annotated, Iterable, Iterator, List, Optional, Set, Tuple
+from collections import OrderedDict
+from collections.abc import Hashable
 from dataclasses import dataclass
 from pokemon import Pokemon, Team, PokemonType, T
 
@@ -15,6 +17,96 @@ class Size:
 
 PokemonPair = Annotated[List[Pokemon], Size(2)]
 LinkedTrainerList = Annotated[List[List[Team[T]]], Size(2)]
+TypeCompletion = Tuple[Tuple[PokemonType, PokemonType], ...]
+TypeCompletions = Tuple[TypeCompletion, ...]
+
+
+class CompletionCache:
+    """LRU cache of type-team completions for the type-team recursion.
+
+    Each entry is keyed by (type grid fingerprint, index, used-type mask, remaining slots,
+    maximal only) and stores every suffix of type pairs that completes a team from that
+    subproblem. The memory cap is the total number of completions stored across all entries,
+    with each entry counting as one more.
+
+    Within a single search, subproblems repeat only when different prefixes use the same types,
+    so the gain is modest, well under 2x. A cache shared by repeated searches of the same roster
+    reuses the whole search.
+    """
+    DEFAULT_MAX_COMPLETIONS = 1_000_000
+
+    def __init__(self, max_completions: int = DEFAULT_MAX_COMPLETIONS) -> None:
+        if max_completions < 0:
+            raise ValueError("max_completions cannot be negative.", max_completions)
+        self._max_completions = max_completions
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_completions(self) -> int:
+        """The maximum number of completions stored in the cache.
+
+        Returns:
+            int: Cache memory cap.
+        """
+        return self._max_completions
+
+    @property
+    def size(self) -> int:
+        """The amount of the memory cap currently used: the stored completions plus one per entry.
+
+        Returns:
+            int: Completions and entries stored in the cache.
+        """
+        return self._size
+
+    def get(self, key: Hashable) -> Optional[TypeCompletions]:
+        """Gets the completions of a subproblem, marking it as recently used.
+
+        Args:
+            key (Hashable): The subproblem key.
+
+        Returns:
+            Optional[TypeCompletions]: The stored completions, or None if not cached.
+        """
+        completions = self._entries.get(key)
+        if completions is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return completions
+
+    def put(self, key: Hashable, completions: TypeCompletions) -> None:
+        """Stores the completions of a subproblem, evicting the least recently used entries
+        until the cache is within its memory cap.
+
+        Args:
+            key (Hashable): The subproblem key.
+            completions (TypeCompletions): Every completion of the subproblem.
+        """
+        if len(completions) + 1 > self._max_completions:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key)) + 1
+        self._entries[key] = completions
+        self._size += len(completions) + 1
+        while self._size > self._max_completions:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted) + 1
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Removes all entries and resets the counters.
+        """
+        self._entries.clear()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
 
 def get_pokemon_teams(pairs: List[PokemonPair]) -> LinkedTrainerList[Pokemon]:
@@ -156,127 +248,268 @@ def format_pokemon_team_pairs(
     return output
 
 
-def get_pokemon_teams_by_type(pairs: List[PokemonPair]) -> LinkedTrainerList[List[Pokemon]]:
+def get_pokemon_teams_by_type(
+        pairs: List[PokemonPair],
+        cache: Optional[CompletionCache] = None) -> LinkedTrainerList[List[Pokemon]]:
     """Gets all possible Pokemon teams between the two trainers,
     with the Pokemon of the same pair typing being listed together.
 
     Args:
         pairs (List[PokemonPair]): The List of Pokemon pairs between the two trainers.
+        cache (Optional[CompletionCache], optional): Cache for memoizing the type-team
+            recursion. Defaults to None, which searches without memoization.
 
     Returns:
         LinkedTrainerList[List[Pokemon]]: Returns a list of possible Team pairs between the
             two trainers, where each Pokemon team slot contains a tuple with all matching Pokemon.
     """
 
-    # Puts each PokemonPair a 2D List based on typing of Pokemons.
-    types = [[[] for _ in range(len(PokemonType))]
-             for _ in range(len(PokemonType))]
+    types = get_type_grid(pairs)
+
+    # Get all possible team combinations by type. Teams that can take another type pair are
+    # sub-teams of another team, so only the maximal teams are kept.
+    type_listings = [
+        [Team([a for a, _ in completion]), Team([b for _, b in completion])]
+        for completion in iter_type_completions(types, maximal_only=True, cache=cache)]
+
+    return [get_pokemon_team_pair_by_type(types, team_pair) for team_pair in type_listings]
+
+
+def get_type_teams_with_type_pair(
+        type_grid: List[List[List[PokemonPair]]],
+        x_type: PokemonType, y_type: PokemonType) -> LinkedTrainerList[PokemonType]:
+    """Gets all unique Pokemon type teams that contain the given type pair.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        x_type (PokemonType): The first trainer's type in the type pair.
+        y_type (PokemonType): The second trainer's type in the type pair.
+
+    Returns:
+        LinkedTrainerList[PokemonType]: The list of Pokemon type teams between the two
+            trainers, with each team pair ordered by the first trainer's types.
+    """
+    # Any team that is maximal among the teams containing the type pair is maximal overall.
+    used = (1 << x_type.value) | (1 << y_type.value)
+    type_listings = iter_type_completions(
+        type_grid, 0, used, Team.MAX_POKEMON - 1, maximal_only=True)
+
+    output = []
+    for completion in type_listings:
+        ordered = sorted(((x_type, y_type),) + completion, key=lambda pair: pair[0].value)
+        output.append([Team([a for a, _ in ordered]), Team([b for _, b in ordered])])
+    return output
+
+
+def get_empty_type_grid() -> List[List[List[PokemonPair]]]:
+    """Creates a 2D-list with an empty list of PokemonPairs for each pair of Pokemon types.
+
+    Returns:
+        List[List[List[PokemonPair]]]: The empty 2D-list, indexed by the first trainer's
+            Pokemon type & the second trainer's Pokemon type.
+    """
+    return [[[] for _ in range(len(PokemonType))]
+            for _ in range(len(PokemonType))]
+
+
+def get_type_grid(pairs: List[PokemonPair]) -> List[List[List[PokemonPair]]]:
+    """Puts each living PokemonPair in a 2D-list based on the typing of the Pokemon.
+
+    Args:
+        pairs (List[PokemonPair]): The List of Pokemon pairs between the two trainers.
+
+    Returns:
+        List[List[List[PokemonPair]]]: The 2D-list of PokemonPairs where each pair is stored by
+            the first trainer's Pokemon type & the second trainer's Pokemon type.
+    """
+    types = get_empty_type_grid()
     for pair in pairs:
         if pair[2]:
             types[pair[0].poke_type.value][pair[1].poke_type.value].append(pair)
+    return types
 
-    # Get all possible team combinations by type
-    type_set = set([])
-    type_listings = _helper_by_type(
-        types, Team(), Team(), type_set, [], [], 0)
 
-    output = []
-    for team_pair in type_listings:
-        output.append(
-            [Team.from_iterator(
-                # Get the list of possible Pokemon matching the type from the team
-                list(list(zip(*types[team_pair[0][i].value][team_pair[1][i].value]))[0])
-                for i in range(len(team_pair[0]))),
-             Team.from_iterator(
-                 # Get the list of possible Pokemon matching the type from the team
-                list(list(zip(*types[team_pair[0][i].value][team_pair[1][i].value]))[1])
-                for i in range(len(team_pair[1])))
-             ])
-    return output
+def get_pokemon_team_pair_by_type(
+        type_grid: List[List[List[PokemonPair]]],
+        team_pair: Annotated[List[List[PokemonType]], Size(2)]) -> List[Team[List[Pokemon]]]:
+    """Converts a pair of type teams into the Pokemon teams matching each type pair.
 
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        team_pair (Annotated[List[List[PokemonType]], Size(2)]): The type teams of both trainers.
 
-def _helper_by_type(
-        type_grid: List[List[PokemonPair]],
-        x: Team, y: Team, type_set: Set[PokemonType],
-        team_pairs: LinkedTrainerList,
-        pair_check: List[Set[Tuple[PokemonType, PokemonType]]],
-        idx: int = 0) -> LinkedTrainerList[List[Pokemon]]:
+    Returns:
+        List[Team[List[Pokemon]]]: The team pair, where each Pokemon team slot contains
+            a list with all matching Pokemon.
+    """
+    team_x = Team.from_iterator(
+        # Get the list of possible Pokemon matching the type from the team
+        list(list(zip(*type_grid[team_pair[0][i].value][team_pair[1][i].value]))[0])
+        for i in range(len(team_pair[0])))
+    team_y = Team.from_iterator(
+        # Get the list of possible Pokemon matching the type from the team
+        list(list(zip(*type_grid[team_pair[0][i].value][team_pair[1][i].value]))[1])
+        for i in range(len(team_pair[1])))
+    return [team_x, team_y]
+
+
+def iter_type_completions(
+        type_grid: List[List[List[PokemonPair]]],
+        idx: int = 0, used: int = 0, remaining: int = Team.MAX_POKEMON, *,
+        maximal_only: bool = False,
+        cache: Optional[CompletionCache] = None) -> Iterator[TypeCompletion]:
     # pylint: disable=too-many-arguments
-    """Gets all possible Pokemon type team combinations.
+    """Yields every suffix of type pairs that completes a team from the given subproblem,
+    in search order. Completions that are sub-teams of other teams are only removed when
+    maximal_only is set.
 
     Args:
-        type_grid (List[List[PokemonPair]]): The 2D-list of PokemonPairs where each pair is 
-            stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
-        x (Team): The current Pokemon team we are constructing for
-            the first trainer (by type).
-        y (Team): The current Pokemon team we are constructing for
-            the second trainer (by type).
-        type_set (Set[Tuple[PokemonType, PokemonType]]): The set of previously used types.
-        team_pairs (LinkedTrainerList): The list of all possible Pokemon team pairs.
-        pair_check (List[Set[Tuple[PokemonType, PokemonType]]]):
-            The list of set of previously used type pairs.
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
         idx (int, optional): The current PokemonType we are checking. Defaults to 0.
+        used (int, optional): Bit mask of previously used types, indexed by PokemonType value.
+            Defaults to 0.
+        remaining (int, optional): The number of open slots left in the team.
+            Defaults to Team.MAX_POKEMON.
+        maximal_only (bool, optional): If true, only yield completions whose team cannot take
+            another type pair. Defaults to False.
+        cache (Optional[CompletionCache], optional): Cache of memoized subproblem completions,
+            which can be shared between type grids. Defaults to None.
+
+    Yields:
+        TypeCompletion: The type pairs completing the team.
+    """
+    fingerprint = None if cache is None else get_type_grid_fingerprint(type_grid)
+    yield from _type_completions(
+        type_grid, idx, used, remaining,
+        maximal_only=maximal_only, cache=cache, fingerprint=fingerprint)
 
-    Returns:
-        LinkedTrainerList[List[Pokemon]]: The list of possible Pokemon type
-            teams between the two trainers.
+
+def _type_completions(
+        type_grid: List[List[List[PokemonPair]]],
+        idx: int, used: int, remaining: int, *, maximal_only: bool,
+        cache: Optional[CompletionCache], fingerprint: Optional[int]) -> Iterator[TypeCompletion]:
+    # pylint: disable=too-many-arguments
+    """Yields the completions of a subproblem, from the cache when possible.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        idx (int): The current PokemonType we are checking.
+        used (int): Bit mask of previously used types, indexed by PokemonType value.
+        remaining (int): The number of open slots left in the team.
+        maximal_only (bool): If true, only yield completions of teams that cannot grow.
+        cache (Optional[CompletionCache]): Cache of memoized subproblem completions.
+        fingerprint (Optional[int]): The fingerprint of the type grid, used in the cache key.
+
+    Yields:
+        TypeCompletion: The type pairs completing the team.
     """
-    if len(x) == Team.MAX_POKEMON or idx == len(type_grid):
-        if _is_team_pair_unique(x, y, pair_check):
-            team_pairs.append([x[:], y[:]])
-            pair_check.append(set((a, b) for a, b in zip(x, y)))
-        return team_pairs
+    if cache is None:
+        yield from _search_type_completions(
+            type_grid, idx, used, remaining,
+            maximal_only=maximal_only, cache=None, fingerprint=None)
+        return
+
+    key = (fingerprint, idx, used, remaining, maximal_only)
+    completions = cache.get(key)
+    if completions is None:
+        completions = tuple(_search_type_completions(
+            type_grid, idx, used, remaining,
+            maximal_only=maximal_only, cache=cache, fingerprint=fingerprint))
+        cache.put(key, completions)
+    yield from completions
+
+
+def _search_type_completions(
+        type_grid: List[List[List[PokemonPair]]],
+        idx: int, used: int, remaining: int, *, maximal_only: bool,
+        cache: Optional[CompletionCache], fingerprint: Optional[int]) -> Iterator[TypeCompletion]:
+    # pylint: disable=too-many-arguments
+    """Searches for the completions of a subproblem by adding each unused type pair.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        idx (int): The current PokemonType we are checking.
+        used (int): Bit mask of previously used types, indexed by PokemonType value.
+        remaining (int): The number of open slots left in the team.
+        maximal_only (bool): If true, only yield completions of teams that cannot grow.
+        cache (Optional[CompletionCache]): Cache of memoized subproblem completions.
+        fingerprint (Optional[int]): The fingerprint of the type grid, used in the cache key.
+
+    Yields:
+        TypeCompletion: The type pairs completing the team.
+    """
+    if remaining == 0 or idx == len(type_grid):
+        if remaining == 0 or not maximal_only or is_type_team_maximal(type_grid, used):
+            yield ()
+        return
 
     found_addition = False
     for i in range(idx, len(PokemonType)):
-        x_type = PokemonType(i)
-        if x_type in type_set:
+        x_bit = 1 << i
+        if used & x_bit:
             continue
         for y_type in PokemonType:
-            if x_type == y_type or y_type in type_set or len(
-                    type_grid[x_type.value][y_type.value]) == 0:
+            y_bit = 1 << y_type.value
+            if i == y_type.value or used & y_bit or len(type_grid[i][y_type.value]) == 0:
                 continue
             found_addition = True
 
-            type_set.add(x_type)
-            type_set.add(y_type)
-            x.append(x_type)
-            y.append(y_type)
+            head = ((PokemonType(i), y_type),)
+            for completion in _type_completions(
+                    type_grid, i+1, used | x_bit | y_bit, remaining - 1,
+                    maximal_only=maximal_only, cache=cache, fingerprint=fingerprint):
+                yield head + completion
 
-            _helper_by_type(type_grid, x, y, type_set,
-                            team_pairs, pair_check, i+1)
+    # A team that cannot take a later type pair is a completion by itself.
+    if not found_addition and remaining < Team.MAX_POKEMON and (
+            not maximal_only or is_type_team_maximal(type_grid, used)):
+        yield ()
 
-            x.pop()
-            y.pop()
-            type_set.discard(x_type)
-            type_set.discard(y_type)
 
-    if not found_addition and len(x) > 0 and _is_team_pair_unique(x, y, pair_check):
-        team_pairs.append([x[:], y[:]])
-        pair_check.append(set((a, b) for a, b in zip(x, y)))
+def is_type_team_maximal(type_grid: List[List[List[PokemonPair]]], used: int) -> bool:
+    """Checks if a type team cannot take another type pair, meaning that it is not
+    a sub-team of any other team.
 
-    return team_pairs
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        used (int): Bit mask of the team's types, indexed by PokemonType value.
 
+    Returns:
+        bool: Is the type team maximal?
+    """
+    if bin(used).count("1") == 2 * Team.MAX_POKEMON:
+        return True
+    for i, row in enumerate(type_grid):
+        if used & (1 << i):
+            continue
+        for j, cell in enumerate(row):
+            if i != j and not used & (1 << j) and len(cell) > 0:
+                return False
+    return True
 
-def _is_team_pair_unique(
-        x: List[PokemonType],
-        y: List[PokemonType],
-        pair_check: List[Set[Tuple[PokemonType, PokemonType]]]) -> bool:
-    """Checks if a given pokemon team is not a sub-team of an already existing team.
+
+def get_type_grid_fingerprint(type_grid: List[List[List[PokemonPair]]]) -> int:
+    """Gets which type pairs of a grid have any Pokemon, which decides its type teams.
 
     Args:
-        x (List[PokemonType]): Player 1's pokemon team types we are testing for its uniqueness.
-        y (List[PokemonType]): Player 2's pokemon team types we are testing for its uniqueness.
-        team_pairs (List[List[List[PokemonType]]]): The list of team types that we are pulling from.
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
 
     Returns:
-        bool: Are the pokemon teams unique among the other generated teams?
+        int: Bit mask of the type pairs with any Pokemon, indexed by row then column.
     """
-    check = set((a, b) for a, b in zip(x, y))
-    for pair in pair_check:
-        if len(check - pair) == 0:
-            return False
-    return True
+    fingerprint = 0
+    for i, row in enumerate(type_grid):
+        for j, cell in enumerate(row):
+            if len(cell) > 0:
+                fingerprint |= 1 << (i * len(row) + j)
+    return fingerprint
 
 
 def format_pokemon_team_pairs_by_type(
@@ -297,38 +530,58 @@ def format_pokemon_team_pairs_by_type(
     Returns:
         str: The formatted team pairs based on the given parameters and configurations.
     """
-    if len(team_pairs) == 0:
-        return ""
     team_pairs.sort(key=lambda x: len(x[0]), reverse=True)
+    return "".join(iter_format_pokemon_team_pairs_by_type(
+        team_pairs, names, min_size, pokemon_name_width, type_name_width))
 
-    size = len(team_pairs[0][0])
+
+def iter_format_pokemon_team_pairs_by_type(
+        team_pairs: Iterable[List[Team[List[Pokemon]]]],
+        names: Annotated[List[str], Size(2)], min_size: int = 0,
+        pokemon_name_width: int = 10, type_name_width: int = 8) -> Iterator[str]:
+    """Formats a pair of Pokemon soul-linked trainers' possible teams piece by piece.
+    The team pairs must already be ordered from largest to smallest team size.
+
+    Args:
+        team_pairs (Iterable[List[Team[List[Pokemon]]]]): The possible team pairs
+            that the trainers can have, ordered by decreasing team size.
+        names (Annotated[List[str], Size(2)]): The names of the two trainers.
+        min_size (int, optional): The minimum size of a team to format. Defaults to 0.
+        pokemon_name_width (int, optional): The width of a Pokemon name. Defaults to 10.
+        type_name_width (int, optional): The width of a Pokemon type. Defaults to 8.
+
+    Yields:
+        str: The formatted sections of the team pairs.
+    """
+    size = None
     count = 0
     unique_type_count = 0
 
-    output = "Pokemon Team Sizes: " + str(size) + "\n"
-    output += "================================================================\n"
-
     for pair in team_pairs:
         curr = len(pair[0])
-        if size != curr:
-            output += "Total Possible Teams: " + str(count) + "\n"
-            output += "Total Unique Team Types: " + \
-                str(unique_type_count) + "\n"
-            output += "--------------------------------\n"
+        if size is None:
+            size = curr
+            yield "Pokemon Team Sizes: " + str(size) + "\n"
+            yield "================================================================\n"
+        elif size != curr:
+            yield "Total Possible Teams: " + str(count) + "\n"
+            yield "Total Unique Team Types: " + str(unique_type_count) + "\n"
+            yield "--------------------------------\n"
 
             size = curr
             count = 0
             unique_type_count = 0
 
             if size < min_size:
-                return output
+                return
 
-            output += "Pokemon Team Sizes: " + str(size) + "\n"
-            output += "================================================================\n"
+            yield "Pokemon Team Sizes: " + str(size) + "\n"
+            yield "================================================================\n"
         team_count = 1
         unique_type_count += 1
 
         # Create strings of each team pair
+        output = ""
         for i, team in enumerate(pair):
             output += names[i] + "\n"
             for x in team:
@@ -346,7 +599,10 @@ def format_pokemon_team_pairs_by_type(
             output += "Team Count: " + str(team_count) + "\n\n"
         count += team_count
         output += "--------------------------------\n"
-    output += "Total Possible Teams: " + str(count) + "\n"
-    output += "Total Unique Team Types: " + str(unique_type_count) + "\n"
-    output += "--------------------------------\n"
-    return output
+        yield output
+
+    if size is None:
+        return
+    yield "Total Possible Teams: " + str(count) + "\n"
+    yield "Total Unique Team Types: " + str(unique_type_count) + "\n"
+    yield "--------------------------------\n"
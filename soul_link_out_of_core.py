@@ -0,0 +1,290 @@
+"""Bounded-memory, out-of-core team search for very large Pokemon Soul Link rosters."""
+
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Annotated, Dict, Iterator, List, Optional, TextIO, Tuple
+from pokemon import PokemonType
+from soul_link_matcher import (
+    PokemonPair, Size, get_type_grid, get_pokemon_team_pair_by_type, is_type_team_maximal,
+    iter_format_pokemon_team_pairs_by_type, iter_type_completions)
+from main import parse_csv
+
+try:
+    import resource
+except ImportError:  # resource is only available on Unix.
+    resource = None
+
+
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Bytes held by the shard buffer for each candidate besides the encoded string itself.
+CANDIDATE_OVERHEAD = 8
+# Maximum number of shards opened at once while merging.
+MAX_MERGE_FAN_IN = 64
+
+TypeTeamPair = Tuple[Tuple[PokemonType, ...], Tuple[PokemonType, ...]]
+
+
+@dataclass
+class OutOfCoreStats:
+    """Statistics of an out-of-core team search.
+    peak_memory is the peak traced memory when tracing, otherwise the process's peak RSS.
+    """
+    candidates: int = 0
+    shards: int = 0
+    teams: int = 0
+    peak_memory: int = 0
+
+
+def write_pokemon_teams_by_type_out_of_core(
+        pairs: List[PokemonPair], output: TextIO,
+        names: Annotated[List[str], Size(2)], *, min_size: int = 0,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        shard_dir: Optional[str] = None, trace_memory: bool = False) -> OutOfCoreStats:
+    # pylint: disable=too-many-arguments
+    """Writes the formatted Pokemon teams between the two trainers without holding every
+    team in memory. The output matches format_pokemon_team_pairs_by_type applied to
+    get_pokemon_teams_by_type.
+
+    Candidate type teams are buffered until they exceed the memory budget, then written to
+    disk as sorted shards grouped by team size. The shards of each size are streamed back
+    through a merge that drops duplicates and teams that are not maximal.
+
+    Args:
+        pairs (List[PokemonPair]): The List of Pokemon pairs between the two trainers.
+        output (TextIO): The stream the formatted teams are written to.
+        names (Annotated[List[str], Size(2)]): The names of the two trainers.
+        min_size (int, optional): The minimum size of a team to format. Defaults to 0.
+        memory_budget (int, optional): The number of bytes of candidates buffered before
+            writing shards. Defaults to DEFAULT_MEMORY_BUDGET.
+        shard_dir (Optional[str], optional): The directory to create the temporary shard
+            directory in. Defaults to None, which uses the system temporary directory.
+        trace_memory (bool, optional): If true, measure the peak memory with tracemalloc,
+            which is exact but slows the search down several times. An existing tracer is
+            reused without resetting its peak. Defaults to False, which reports the process's
+            peak RSS.
+
+    Returns:
+        OutOfCoreStats: Statistics of the search, including the peak memory in bytes.
+    """
+    if memory_budget <= 0:
+        raise ValueError("memory_budget must be positive.", memory_budget)
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    stats = OutOfCoreStats()
+    type_grid = get_type_grid(pairs)
+    try:
+        with tempfile.TemporaryDirectory(dir=shard_dir) as tmp_dir:
+            shards = _write_shards(type_grid, tmp_dir, memory_budget, stats)
+
+            for size, names_by_size in shards.items():
+                shards[size] = _compact_shards(names_by_size)
+
+            for text in iter_format_pokemon_team_pairs_by_type(
+                    (get_pokemon_team_pair_by_type(type_grid, team_pair)
+                     for team_pair in _merge_shards(type_grid, shards, stats)),
+                    names, min_size):
+                output.write(text)
+        if trace_memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        else:
+            stats.peak_memory = _get_peak_rss()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return stats
+
+
+def _get_peak_rss() -> int:
+    """Gets the peak resident set size of the process.
+
+    Returns:
+        int: The peak RSS in bytes, or 0 if it is not available on this platform.
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes.
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+def _write_shards(
+        type_grid: List[List[List[PokemonPair]]], shard_dir: str,
+        memory_budget: int, stats: OutOfCoreStats) -> Dict[int, List[str]]:
+    """Writes every candidate type team to sorted shards grouped by team size.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        shard_dir (str): The directory to write shards to.
+        memory_budget (int): The number of bytes of candidates buffered before writing shards.
+        stats (OutOfCoreStats): The statistics updated with the candidates and shards written.
+
+    Returns:
+        Dict[int, List[str]]: The shard file names for each team size.
+    """
+    shards = {}
+    buffers = {}
+    buffered = 0
+
+    def flush() -> None:
+        for size, lines in buffers.items():
+            lines.sort()
+            name = os.path.join(shard_dir, f"size{size}_{len(shards.get(size, []))}.txt")
+            with open(name, "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in lines)
+            shards.setdefault(size, []).append(name)
+            stats.shards += 1
+        buffers.clear()
+
+    for completion in iter_type_completions(type_grid):
+        line = _encode_type_team_pair(completion)
+        buffers.setdefault(len(completion), []).append(line)
+        buffered += sys.getsizeof(line) + CANDIDATE_OVERHEAD
+        stats.candidates += 1
+        if buffered >= memory_budget:
+            flush()
+            buffered = 0
+    flush()
+    return shards
+
+
+def _compact_shards(shards: List[str]) -> List[str]:
+    """Merges groups of sorted shards into larger sorted shards until no more than
+    MAX_MERGE_FAN_IN remain.
+
+    Args:
+        shards (List[str]): The shard file names of a single team size.
+
+    Returns:
+        List[str]: The remaining shard file names.
+    """
+    while len(shards) > MAX_MERGE_FAN_IN:
+        merged = []
+        for i in range(0, len(shards), MAX_MERGE_FAN_IN):
+            group = shards[i:i + MAX_MERGE_FAN_IN]
+            name = group[0] + ".merged"
+            with ExitStack() as stack:
+                files = [stack.enter_context(open(shard, "r", encoding="utf-8"))
+                         for shard in group]
+                with open(name, "w", encoding="utf-8") as f:
+                    f.writelines(heapq.merge(*files))
+            for shard in group:
+                os.remove(shard)
+            merged.append(name)
+        shards = merged
+    return shards
+
+
+def _merge_shards(
+        type_grid: List[List[List[PokemonPair]]],
+        shards: Dict[int, List[str]], stats: OutOfCoreStats) -> Iterator[TypeTeamPair]:
+    """Streams the unique, maximal type teams back from the shards, from the largest
+    team size to the smallest and in search order within each size.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        shards (Dict[int, List[str]]): The shard file names for each team size.
+        stats (OutOfCoreStats): The statistics updated with the teams found.
+
+    Yields:
+        TypeTeamPair: The type teams of both trainers.
+    """
+    for size in sorted(shards, reverse=True):
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(name, "r", encoding="utf-8"))
+                     for name in shards[size]]
+            previous = None
+            for line in heapq.merge(*files):
+                if line == previous:
+                    continue
+                previous = line
+                x, y = _decode_type_team_pair(line.rstrip("\n"))
+                used = 0
+                for poke_type in x + y:
+                    used |= 1 << poke_type.value
+                if is_type_team_maximal(type_grid, used):
+                    stats.teams += 1
+                    yield x, y
+
+
+def _encode_type_team_pair(type_pairs: Tuple[Tuple[PokemonType, PokemonType], ...]) -> str:
+    """Encodes a type team pair as a string that sorts in search order among teams of
+    the same size.
+
+    Args:
+        type_pairs (Tuple[Tuple[PokemonType, PokemonType], ...]): The type pairs of the team,
+            in search order.
+
+    Returns:
+        str: The encoded type team pair.
+    """
+    return "".join(chr(ord("a") + a.value) + chr(ord("a") + b.value) for a, b in type_pairs)
+
+
+def _decode_type_team_pair(line: str) -> TypeTeamPair:
+    """Decodes a type team pair encoded by _encode_type_team_pair.
+
+    Args:
+        line (str): The encoded type team pair.
+
+    Returns:
+        TypeTeamPair: The type teams of both trainers.
+    """
+    types = [PokemonType(ord(c) - ord("a")) for c in line]
+    return tuple(types[0::2]), tuple(types[1::2])
+
+
+def parse_args() -> argparse.Namespace:
+    """Creates the default parser for arguments.
+
+    Returns:
+        Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser("")
+    parser.add_argument("-f", "--filename", default="pokemon.csv",
+                        help="The CSV file of Pokemon pairs.")
+    parser.add_argument("-o", "--output", default="test.txt",
+                        help="The output file for the teams found.")
+    parser.add_argument("-n", "--names", nargs=2, default=["Ray", "Shen"],
+                        help="The names of the two trainers.")
+    parser.add_argument("-m", "--memory", type=int, default=DEFAULT_MEMORY_BUDGET // 2**20,
+                        help="The memory budget for buffering candidate teams, in MiB.")
+    parser.add_argument("-d", "--shard-dir", default=None,
+                        help="The directory to write temporary shards to.")
+    parser.add_argument("-t", "--trace-memory", action="store_true",
+                        help="Measure the peak memory with tracemalloc instead of the peak RSS.")
+    return parser.parse_args()
+
+
+def main():
+    """The main function
+    """
+    args = parse_args()
+    pairs = parse_csv(args.filename)
+    with open(args.output, "w+", encoding="utf-8") as f:
+        stats = write_pokemon_teams_by_type_out_of_core(
+            pairs, f, args.names, memory_budget=args.memory * 2**20, shard_dir=args.shard_dir,
+            trace_memory=args.trace_memory)
+    print("Candidate Teams: " + str(stats.candidates))
+    print("Shards: " + str(stats.shards))
+    print("Unique Team Types: " + str(stats.teams))
+    if args.trace_memory:
+        print("Peak Traced Memory (bytes): " + str(stats.peak_memory))
+    else:
+        print("Peak RSS (bytes): " + str(stats.peak_memory))
+
+
+if __name__ == "__main__":
+    main()
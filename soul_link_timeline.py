@@ -0,0 +1,151 @@
+"""Route-ordered timeline of the Pokemon teams available after every encounter."""
+
+import argparse
+import csv
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Set, Tuple
+from pokemon import PokemonType, Team
+from soul_link_matcher import PokemonPair, get_empty_type_grid, get_type_teams_with_type_pair
+from main import parse_csv
+
+
+TypeTeam = Tuple[Tuple[PokemonType, PokemonType], ...]
+
+
+@dataclass
+class TimelineEntry:
+    """The team options available after an encounter.
+    """
+    row: int
+    pair: PokemonPair
+    best_size: int = 0
+    unique_team_types: Dict[int, int] = field(default_factory=dict)
+    possible_teams: Dict[int, int] = field(default_factory=dict)
+
+
+def iter_pokemon_team_timeline(pairs: List[PokemonPair]) -> Iterator[TimelineEntry]:
+    """Yields the team options between the two trainers after each Pokemon pair, in order.
+    Each entry matches get_pokemon_teams_by_type run on the pairs up to and including it.
+
+    The unique type teams are kept between pairs. A pair whose type pair was already caught
+    only changes the team counts. A pair with a new type pair removes the teams it can be
+    added to, and adds the teams that contain it.
+
+    Args:
+        pairs (List[PokemonPair]): The List of Pokemon pairs between the two trainers,
+            in route order.
+
+    Yields:
+        TimelineEntry: The team options after each pair.
+    """
+    type_grid = get_empty_type_grid()
+    teams: Set[TypeTeam] = set()
+
+    for row, pair in enumerate(pairs):
+        if pair[2]:
+            x_type = pair[0].poke_type
+            y_type = pair[1].poke_type
+            cell = type_grid[x_type.value][y_type.value]
+            cell.append(pair)
+            if len(cell) == 1 and x_type != y_type:
+                _add_type_pair(type_grid, teams, x_type, y_type)
+
+        yield _get_timeline_entry(type_grid, teams, row, pair)
+
+
+def _add_type_pair(
+        type_grid: List[List[List[PokemonPair]]], teams: Set[TypeTeam],
+        x_type: PokemonType, y_type: PokemonType) -> None:
+    """Updates the unique type teams after a type pair becomes available.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        teams (Set[TypeTeam]): The unique type teams, updated in place.
+        x_type (PokemonType): The first trainer's type in the new type pair.
+        y_type (PokemonType): The second trainer's type in the new type pair.
+    """
+    # Teams that can take the new type pair are now sub-teams.
+    for team in list(teams):
+        if len(team) == Team.MAX_POKEMON:
+            continue
+        if all(x_type not in pair and y_type not in pair for pair in team):
+            teams.discard(team)
+
+    for team_pair in get_type_teams_with_type_pair(type_grid, x_type, y_type):
+        teams.add(tuple(zip(*team_pair)))
+
+
+def _get_timeline_entry(
+        type_grid: List[List[List[PokemonPair]]], teams: Set[TypeTeam],
+        row: int, pair: PokemonPair) -> TimelineEntry:
+    """Counts the unique type teams and possible teams of each team size.
+
+    Args:
+        type_grid (List[List[List[PokemonPair]]]): The 2D-list of PokemonPairs where each pair
+            is stored by the first trainer's Pokemon type & the second trainer's Pokemon type.
+        teams (Set[TypeTeam]): The unique type teams.
+        row (int): The index of the latest Pokemon pair.
+        pair (PokemonPair): The latest Pokemon pair.
+
+    Returns:
+        TimelineEntry: The team options after the latest pair.
+    """
+    entry = TimelineEntry(row, pair)
+    for team in teams:
+        size = len(team)
+        team_count = 1
+        for x_type, y_type in team:
+            team_count *= len(type_grid[x_type.value][y_type.value])
+        entry.unique_team_types[size] = entry.unique_team_types.get(size, 0) + 1
+        entry.possible_teams[size] = entry.possible_teams.get(size, 0) + team_count
+        entry.best_size = max(entry.best_size, size)
+    return entry
+
+
+def write_timeline_csv(timeline: Iterator[TimelineEntry], file: str) -> None:
+    """Writes a timeline as a CSV file, with one row per Pokemon pair.
+
+    Args:
+        timeline (Iterator[TimelineEntry]): The timeline entries.
+        file (str): File name
+    """
+    sizes = range(Team.MAX_POKEMON, 0, -1)
+    with open(file, "w+", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        header = ["Row", "Pokemon 1", "Pokemon 2", "Best Team Size"]
+        for size in sizes:
+            header += [f"Size {size} Unique Team Types", f"Size {size} Possible Teams"]
+        writer.writerow(header)
+
+        for entry in timeline:
+            line = [entry.row + 1, entry.pair[0].name, entry.pair[1].name, entry.best_size]
+            for size in sizes:
+                line += [entry.unique_team_types.get(size, 0), entry.possible_teams.get(size, 0)]
+            writer.writerow(line)
+
+
+def parse_args() -> argparse.Namespace:
+    """Creates the default parser for arguments.
+
+    Returns:
+        Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser("")
+    parser.add_argument("-f", "--filename", default="pokemon.csv",
+                        help="The CSV file of Pokemon pairs, in route order.")
+    parser.add_argument("-o", "--output", default="timeline.csv",
+                        help="The output CSV file for the timeline.")
+    return parser.parse_args()
+
+
+def main():
+    """The main function
+    """
+    args = parse_args()
+    pairs = parse_csv(args.filename)
+    write_timeline_csv(iter_pokemon_team_timeline(pairs), args.output)
+
+
+if __name__ == "__main__":
+    main()